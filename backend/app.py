@@ -12,6 +12,8 @@ from flask import current_app
 from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure, OperationFailure
 from dotenv import load_dotenv
+from response_layer import json_response, latest_reading_timestamp, not_modified
+from reference_table import LookupGrid
 
 # Load environment variables
 load_dotenv()
@@ -24,6 +26,8 @@ DATA_FILE = os.path.join(BASE_DIR, "corrected_precautionary_data.csv")
 MODEL_FILE = os.path.join(BASE_DIR, "pollution_cnn_lstm_model.h5")
 SCALER_FILE = os.path.join(BASE_DIR, "pollution_scaler.pkl")
 LABEL_ENCODER_FILE = os.path.join(BASE_DIR, "pollution_label_encoder.pkl")
+# Rebuilt on start whenever it no longer matches the dataset or scaler
+GRID_FILE = os.path.join(BASE_DIR, "pollution_lookup_grid.npz")
 
 # MongoDB Configuration
 MONGODB_URI = os.getenv('MONGODB_URI')
@@ -139,6 +143,22 @@ except Exception as e:
     label_encoder = None
     df = None
 
+lookup_grid = None
+if df is not None and scaler is not None:
+    try:
+        lookup_grid = LookupGrid.load(GRID_FILE, df, scaler)
+        if lookup_grid is None:
+            # /predict appends to the CSV, so this happens after most restarts
+            print("Building lookup grid...")
+            lookup_grid = LookupGrid.build(df, scaler)
+            try:
+                lookup_grid.save(GRID_FILE)
+            except Exception as save_error:
+                print(f"Warning: Could not save lookup grid: {save_error}")
+        print(f"Lookup grid ready ({lookup_grid.mean_candidates:.1f} candidate rows per cell).")
+    except Exception as e:
+        print(f"Warning: Could not prepare lookup grid, using full scan: {e}")
+
 
 @app.route('/predict', methods=['POST', 'OPTIONS'])
 def predict():
@@ -307,7 +327,11 @@ def predict_logic(co, no2, pm25, so2, city_name):
         # STEP 3: Closest Row Lookup from Dataset
         # =======================
         try:
-            closest_row = df.iloc[((df[features] - user_input) ** 2).sum(axis=1).idxmin()]
+            grid_row = lookup_grid.lookup(user_input[0]) if lookup_grid is not None else None
+            if grid_row is not None:
+                closest_row = df.iloc[grid_row]
+            else:
+                closest_row = df.iloc[((df[features] - user_input) ** 2).sum(axis=1).idxmin()]
         except Exception as e:
             return {"error": f"Closest row lookup failed: {str(e)}"}
 
@@ -354,19 +378,20 @@ def get_historical_data():
         if city:
             query['city'] = city
         
-        # Get data sorted by timestamp (newest first)
-        cursor = aqi_collection.find(query).sort('timestamp', -1).limit(limit)
+        # Skip the full query if the client already has the newest reading
+        latest_timestamp = latest_reading_timestamp(aqi_collection, query)
+        cached = not_modified(latest_timestamp)
+        if cached is not None:
+            return cached
         
-        data = []
-        for doc in cursor:
-            doc['_id'] = str(doc['_id'])  # Convert ObjectId to string
-            data.append(doc)
+        # Get data sorted by timestamp (newest first)
+        data = list(aqi_collection.find(query).sort('timestamp', -1).limit(limit))
         
-        return jsonify({
+        return json_response({
             "success": True,
             "count": len(data),
             "data": data
-        }), 200
+        }, latest_timestamp=latest_timestamp)
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -436,21 +461,24 @@ def mongodb_stats():
         return jsonify({"connected": False, "error": "MongoDB not connected"}), 500
     
     try:
+        # Get latest record; stats only change when a new reading arrives
+        latest_timestamp = latest_reading_timestamp(aqi_collection)
+        cached = not_modified(latest_timestamp)
+        if cached is not None:
+            return cached
+        
         total_count = aqi_collection.count_documents({})
         
         # Get unique cities
         cities = aqi_collection.distinct('city')
         
-        # Get latest record
-        latest = aqi_collection.find_one(sort=[('timestamp', -1)])
-        
-        return jsonify({
+        return json_response({
             "connected": True,
             "total_records": total_count,
             "unique_cities": len(cities),
             "cities": cities,
-            "latest_timestamp": latest['timestamp'] if latest else None
-        }), 200
+            "latest_timestamp": latest_timestamp
+        }, latest_timestamp=latest_timestamp)
         
     except Exception as e:
         return jsonify({"connected": False, "error": str(e)}), 500
@@ -0,0 +1,58 @@
+import argparse
+import os
+import shutil
+from datetime import datetime
+
+import joblib
+import pandas as pd
+
+from reference_table import DEFAULT_GRID_BINS, LookupGrid, compact
+
+# =======================
+# CONFIGURATION
+# =======================
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_FILE = os.path.join(BASE_DIR, "corrected_precautionary_data.csv")
+SCALER_FILE = os.path.join(BASE_DIR, "pollution_scaler.pkl")
+GRID_FILE = os.path.join(BASE_DIR, "pollution_lookup_grid.npz")
+
+parser = argparse.ArgumentParser(
+    description="Deduplicate the closest-row reference dataset, then rebuild the lookup grid."
+)
+parser.add_argument("--thin", action="store_true",
+                    help="also drop rows whose closest-row answers other rows already give "
+                         "(removes training rows for train_model.py)")
+parser.add_argument("--grid-bins", type=int, default=DEFAULT_GRID_BINS,
+                    help="lookup grid cells along the widest feature (0 skips building it)")
+parser.add_argument("--dry-run", action="store_true", help="report sizes without writing anything")
+args = parser.parse_args()
+
+# =======================
+# COMPACT DATASET
+# =======================
+df = pd.read_csv(DATA_FILE)
+compacted = compact(df, thin=args.thin)
+print(f"Rows: {len(df)} -> {len(compacted)}")
+
+if args.dry_run:
+    raise SystemExit(0)
+
+if len(compacted) < len(df):
+    # One backup per run so repeated runs never overwrite the original
+    backup_file = f"{DATA_FILE}.{datetime.now():%Y%m%d-%H%M%S}.bak"
+    shutil.copyfile(DATA_FILE, backup_file)
+    compacted.to_csv(DATA_FILE, index=False)
+    print(f"✓ Dataset compacted: {DATA_FILE} (backup: {backup_file})")
+else:
+    print("✓ Dataset already compact")
+
+# =======================
+# REBUILD LOOKUP GRID
+# =======================
+if args.grid_bins > 0:
+    scaler = joblib.load(SCALER_FILE)
+    # Build against the CSV as the backend will read it back
+    grid = LookupGrid.build(pd.read_csv(DATA_FILE), scaler, bins=args.grid_bins)
+    grid.save(GRID_FILE)
+    print(f"✓ Lookup grid saved: {GRID_FILE} ({' x '.join(map(str, grid.shape))} cells, "
+          f"{grid.mean_candidates:.1f} candidate rows per cell)")
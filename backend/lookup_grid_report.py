@@ -0,0 +1,78 @@
+import argparse
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from reference_table import FEATURES, LookupGrid, nearest_rows
+
+# =======================
+# CONFIGURATION
+# =======================
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_FILE = os.path.join(BASE_DIR, "corrected_precautionary_data.csv")
+SCALER_FILE = os.path.join(BASE_DIR, "pollution_scaler.pkl")
+GRID_FILE = os.path.join(BASE_DIR, "pollution_lookup_grid.npz")
+
+parser = argparse.ArgumentParser(description="Compare lookup grid answers and speed with the exact closest-row scan.")
+parser.add_argument("--samples", type=int, default=20000, help="random queries drawn over the scaler's range")
+parser.add_argument("--seed", type=int, default=0)
+args = parser.parse_args()
+
+df = pd.read_csv(DATA_FILE)
+scaler = joblib.load(SCALER_FILE)
+grid = LookupGrid.load(GRID_FILE, df, scaler)
+if grid is None:
+    print(f"✗ No lookup grid at {GRID_FILE} matching the dataset and scaler. Run compact_dataset.py first.")
+    raise SystemExit(1)
+
+reference = df[FEATURES].to_numpy(dtype=float)
+
+rng = np.random.default_rng(args.seed)
+span = scaler.data_max_ - scaler.data_min_
+query_sets = {
+    "dataset rows": reference,
+    # Readings near known ones, which is where real queries land
+    "jittered rows": reference + rng.normal(0.0, 0.02, reference.shape) * span,
+    "uniform random": scaler.inverse_transform(rng.random((args.samples, len(FEATURES)))),
+}
+
+print("=" * 60)
+print(f"LOOKUP GRID REPORT ({' x '.join(map(str, grid.shape))} cells, "
+      f"{grid.mean_candidates:.1f} candidate rows per cell)")
+print("=" * 60)
+
+for name, queries in query_sets.items():
+    exact = nearest_rows(queries, reference)
+    answered = np.array([-1 if (row := grid.lookup(point)) is None else row for point in queries])
+    sizes = np.array([len(c) for point in queries if (c := grid.cell_candidates(point)) is not None])
+
+    hits = answered >= 0
+    mismatched = answered[hits] != exact[hits]
+
+    print(f"\n{name}: {len(queries)} queries")
+    print(f"  Answered by grid:   {hits.mean():.1%} (rest are outside the scaler's range)")
+    if hits.any():
+        print(f"  Differs from exact: {mismatched.sum()}")
+        print(f"  Rows scanned:       mean {sizes.mean():.1f}, max {sizes.max()} of {len(reference)}")
+
+# =======================
+# TIMING
+# =======================
+# One query at a time, the way predict_logic runs them
+sample = query_sets["jittered rows"][:500]
+
+start = time.perf_counter()
+for point in sample:
+    df.iloc[((df[FEATURES] - point) ** 2).sum(axis=1).idxmin()]
+scan_time = (time.perf_counter() - start) / len(sample)
+
+start = time.perf_counter()
+for point in sample:
+    row = grid.lookup(point)
+    df.iloc[row if row is not None else ((df[FEATURES] - point) ** 2).sum(axis=1).idxmin()]
+grid_time = (time.perf_counter() - start) / len(sample)
+
+print(f"\nPer query: full scan {scan_time * 1e6:.0f} µs, grid {grid_time * 1e6:.0f} µs")
@@ -0,0 +1,202 @@
+import hashlib
+import os
+from bisect import insort
+
+import numpy as np
+import pandas as pd
+
+# =======================
+# CONFIGURATION
+# =======================
+FEATURES = ["CO", "NO2", "PM2.5", "SO2"]
+# What the closest-row lookup answers with (predict_logic reads all three)
+ANSWER_COLUMNS = ["health_impact", "Precautionary_Measures", "AQI"]
+
+# Cells along the feature with the widest raw range
+DEFAULT_GRID_BINS = 64
+# Upper bound on the points x rows x features distance temporary (~32 MB)
+CHUNK_ELEMENTS = 4_000_000
+
+
+# =======================
+# EXACT LOOKUP
+# =======================
+def nearest_rows(points, reference):
+    """
+    Position of the closest reference row for every point.
+
+    Same metric and tie-breaking as predict_logic's lookup: squared
+    Euclidean distance on raw features, first row wins a tie.
+    """
+    points = np.asarray(points, dtype=float)
+    reference = np.asarray(reference, dtype=float)
+    # Direct differences rather than the |a|^2 - 2ab + |b|^2 expansion, whose
+    # rounding could break near-ties differently from predict_logic
+    chunk_size = max(1, CHUNK_ELEMENTS // max(1, reference.size))
+    result = np.empty(len(points), dtype=np.int64)
+    for start in range(0, len(points), chunk_size):
+        chunk = points[start:start + chunk_size]
+        distances = ((chunk[:, None, :] - reference[None, :, :]) ** 2).sum(axis=2)
+        result[start:start + chunk_size] = distances.argmin(axis=1)
+    return result
+
+
+def answer_keys(df, columns=ANSWER_COLUMNS):
+    """Integer category per row, equal for rows giving the same answer."""
+    keys = df[columns].astype(str).agg("\x1f".join, axis=1)
+    return pd.factorize(keys)[0]
+
+
+# =======================
+# COMPACTION
+# =======================
+def compact(df, thin=False):
+    """
+    Deduplicate and optionally thin the reference table.
+
+    Exact duplicates on the feature columns are collapsed to their first
+    occurrence, which is the row the closest-row lookup already returned.
+    With thin=True the remaining rows are reduced with Hart's condensed
+    nearest neighbour rule: the result is a subset in which every original
+    row's closest neighbour still has that row's health impact,
+    precautionary measure and AQI. Thinning also drops training rows for
+    train_model.py, hence off by default.
+    """
+    df = df.dropna(subset=FEATURES + ANSWER_COLUMNS)
+    df = df.drop_duplicates(subset=FEATURES, keep="first").reset_index(drop=True)
+    if not thin or df.empty:
+        return df
+
+    values = df[FEATURES].to_numpy(dtype=float)
+    keys = answer_keys(df)
+
+    # Kept in row order so ties go to the earlier row, as in the final lookup
+    kept = [0]
+    changed = True
+    while changed:
+        changed = False
+        for i in range(len(df)):
+            kept_values = values[kept]
+            nearest = kept[int(((kept_values - values[i]) ** 2).sum(axis=1).argmin())]
+            if keys[nearest] != keys[i]:
+                insort(kept, i)
+                changed = True
+
+    return df.iloc[kept].reset_index(drop=True)
+
+
+# =======================
+# PRECOMPUTED LOOKUP GRID
+# =======================
+def fingerprint(df, scaler):
+    """Hash of the rows and scaler a grid was built against; both must match."""
+    digest = hashlib.sha1()
+    digest.update(df[FEATURES].to_numpy(dtype=float).tobytes())
+    digest.update("\x1e".join(df[ANSWER_COLUMNS].astype(str).agg("\x1f".join, axis=1)).encode("utf-8"))
+    digest.update(np.asarray(scaler.data_min_, dtype=float).tobytes())
+    digest.update(np.asarray(scaler.data_max_, dtype=float).tobytes())
+    return digest.hexdigest()
+
+
+class LookupGrid:
+    """
+    Exact closest-row lookup bucketed over the quantised, scaled feature space.
+
+    The scaled space [0, 1]^4 is cut into cells, with `bins` cells along the
+    feature of widest raw range and proportionally fewer along the others,
+    so cells are roughly cubic in the raw units the distance is measured
+    in. Each cell lists, in row order, every row that can be closest
+    somewhere inside it: a row is dropped only when its distance to the
+    cell's nearest point exceeds some other row's distance to the cell's
+    farthest point. A query then takes the argmin over its cell's few
+    candidates instead of the whole table, with the same metric and
+    first-row-wins tie-break as predict_logic. lookup() returns None for
+    inputs outside the scaler's range, so callers fall back to the full scan.
+    """
+
+    # Slack on the bounds for rounding in the scaler and the distance sums
+    TOLERANCE = 1e-9
+
+    def __init__(self, reference, scaler, offsets, candidates, shape, fingerprint):
+        self.reference = reference
+        self.scale = np.asarray(scaler.scale_, dtype=float)
+        self.shift = np.asarray(scaler.min_, dtype=float)
+        self.offsets = offsets
+        self.candidates = candidates
+        self.shape = tuple(int(n) for n in shape)
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, df, scaler, bins=DEFAULT_GRID_BINS):
+        reference = df[FEATURES].to_numpy(dtype=float)
+        span = np.asarray(scaler.data_max_, dtype=float) - np.asarray(scaler.data_min_, dtype=float)
+        shape = tuple(np.maximum(1, np.rint(bins * span / span.max())).astype(int))
+
+        # Per feature, squared distance from every row to the nearest and the
+        # farthest point of each cell interval (widened by the tolerance):
+        # arrays of shape (cells along the feature, rows)
+        near, far = [], []
+        for f, cells in enumerate(shape):
+            scaled_edges = np.linspace(0.0, 1.0, cells + 1)
+            edges = (scaled_edges - scaler.min_[f]) / scaler.scale_[f]
+            slack = (edges[-1] - edges[0]) * cls.TOLERANCE
+            low = edges[:-1, None] - slack
+            high = edges[1:, None] + slack
+            values = reference[None, :, f]
+            near.append((np.maximum(low - values, 0.0) + np.maximum(values - high, 0.0)) ** 2)
+            far.append(np.maximum(values - low, high - values) ** 2)
+
+        counts = np.empty(shape, dtype=np.int64)
+        chunks = []
+        for i, j in np.ndindex(shape[0], shape[1]):
+            near_ij = (near[0][i] + near[1][j]) + near[2][:, None, :] + near[3][None, :, :]
+            far_ij = (far[0][i] + far[1][j]) + far[2][:, None, :] + far[3][None, :, :]
+            bound = far_ij.min(axis=2, keepdims=True)
+            possible = near_ij <= bound * (1 + cls.TOLERANCE)
+            counts[i, j] = possible.sum(axis=2)
+            chunks.append(np.nonzero(possible)[2].astype(np.int32))
+
+        offsets = np.concatenate([[0], np.cumsum(counts.ravel())])
+        candidates = np.concatenate(chunks)
+        return cls(reference, scaler, offsets, candidates, shape, fingerprint(df, scaler))
+
+    def save(self, path):
+        np.savez_compressed(path, offsets=self.offsets, candidates=self.candidates,
+                            shape=np.array(self.shape), fingerprint=np.array(self.fingerprint))
+
+    @classmethod
+    def load(cls, path, df, scaler):
+        """Load a saved grid, or None if missing or built for other data or scaler."""
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as saved:
+            if str(saved["fingerprint"]) != fingerprint(df, scaler):
+                return None
+            return cls(df[FEATURES].to_numpy(dtype=float), scaler, saved["offsets"],
+                       saved["candidates"], saved["shape"], str(saved["fingerprint"]))
+
+    @property
+    def mean_candidates(self):
+        """Average candidate rows per cell."""
+        return len(self.candidates) / (len(self.offsets) - 1)
+
+    def cell_candidates(self, point):
+        """Candidate row positions for one raw feature vector, or None."""
+        point = np.asarray(point, dtype=float).ravel()
+        scaled = point * self.scale + self.shift
+        # The cell bounds carry the same slack, so edge readings that round
+        # just past 0 or 1 can go in the outermost cells
+        if not np.all((scaled >= -self.TOLERANCE) & (scaled <= 1.0 + self.TOLERANCE)):
+            return None
+        cells = np.array(self.shape)
+        index = np.clip(np.floor(scaled * cells).astype(int), 0, cells - 1)
+        cell = np.ravel_multi_index(tuple(index), self.shape)
+        return self.candidates[self.offsets[cell]:self.offsets[cell + 1]]
+
+    def lookup(self, point):
+        """Closest row position for one raw feature vector, or None."""
+        candidates = self.cell_candidates(point)
+        if candidates is None:
+            return None
+        distances = ((self.reference[candidates] - np.asarray(point, dtype=float).ravel()) ** 2).sum(axis=1)
+        return int(candidates[distances.argmin()])
@@ -0,0 +1,143 @@
+import gzip
+import hashlib
+from datetime import timezone
+
+import brotli
+import numpy as np
+import orjson
+from bson import ObjectId
+from flask import Response, request
+
+# =======================
+# CONFIGURATION
+# =======================
+# Bodies smaller than this are sent as-is: compressing them costs more CPU
+# than it saves on the wire.
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+# =======================
+# JSON ENCODING
+# =======================
+def _default(obj):
+    """Fallback for types orjson does not serialise natively."""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, np.generic):
+        # NumPy scalars orjson skips (e.g. float16); NaN/inf become null
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        # Arrays of unsupported dtypes, e.g. object arrays of ObjectIds
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(payload):
+    """
+    Serialise payload to UTF-8 JSON bytes (NumPy, datetime and ObjectId aware).
+
+    Non-finite floats, Python or NumPy, are written as null so the output is
+    always valid JSON.
+    """
+    return orjson.dumps(
+        payload,
+        default=_default,
+        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS,
+    )
+
+
+# =======================
+# COMPRESSION
+# =======================
+def _accepts(encoding):
+    return encoding in request.accept_encodings and request.accept_encodings[encoding] > 0
+
+
+def compress(body):
+    """Compress body for the current request; returns (body, content_encoding)."""
+    if len(body) < MIN_COMPRESS_SIZE:
+        return body, None
+    if _accepts("br"):
+        return brotli.compress(body, quality=BROTLI_QUALITY), "br"
+    if _accepts("gzip"):
+        return gzip.compress(body, compresslevel=GZIP_LEVEL), "gzip"
+    return body, None
+
+
+# =======================
+# CONDITIONAL GET
+# =======================
+def _as_utc(value):
+    # MongoDB hands back naive datetimes that are already UTC (we store
+    # datetime.utcnow()), so tag them explicitly for the browser.
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def latest_reading_timestamp(collection, query=None):
+    """Timestamp of the newest reading matching query, or None."""
+    latest = collection.find_one(query or {}, {"timestamp": 1}, sort=[("timestamp", -1)])
+    return latest["timestamp"] if latest else None
+
+
+def make_etag(latest_timestamp):
+    """Weak ETag for the current URL as of latest_timestamp."""
+    key = f"{request.full_path}|{_as_utc(latest_timestamp).isoformat()}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def not_modified(latest_timestamp):
+    """
+    Answer the request with 304 if the client's copy is still current.
+
+    Returns a ready 304 response, or None when the full payload must be built.
+    If-None-Match wins when both validators are sent, as browsers do. Clients
+    sending only If-Modified-Since are compared at HTTP-date resolution, so a
+    reading stored later in the same second as their copy goes unnoticed
+    until the next one arrives.
+    """
+    if latest_timestamp is None:
+        return None
+
+    etag = make_etag(latest_timestamp)
+    if request.if_none_match:
+        fresh = request.if_none_match.contains_weak(etag)
+    elif request.if_modified_since is not None:
+        # HTTP dates only carry whole seconds
+        last_modified = _as_utc(latest_timestamp).replace(microsecond=0)
+        fresh = last_modified <= _as_utc(request.if_modified_since)
+    else:
+        fresh = False
+
+    if not fresh:
+        return None
+
+    response = Response(status=304)
+    _set_validators(response, latest_timestamp)
+    return response
+
+
+def _set_validators(response, latest_timestamp):
+    response.set_etag(make_etag(latest_timestamp), weak=True)
+    response.last_modified = _as_utc(latest_timestamp)
+    response.headers["Cache-Control"] = "no-cache"
+
+
+def json_response(payload, status=200, latest_timestamp=None):
+    """
+    Build a compressed JSON response.
+
+    When latest_timestamp is given the response carries ETag/Last-Modified so
+    pollers can revalidate with a conditional GET.
+    """
+    body, encoding = compress(dumps(payload))
+    response = Response(body, status=status, mimetype="application/json")
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    if latest_timestamp is not None and status == 200:
+        _set_validators(response, latest_timestamp)
+    return response
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import MinMaxScaler
+
+import reference_table
+from reference_table import FEATURES, LookupGrid, compact, nearest_rows
+
+HEALTH = ["Good", "Moderate", "Unhealthy"]
+MEASURES = ["No action needed", "Limit outdoor activity", "Wear a mask outdoors"]
+
+
+def make_dataset(rows=300, seed=0):
+    """Random readings whose answers depend on PM2.5, like the real dataset."""
+    rng = np.random.default_rng(seed)
+    values = rng.random((rows, len(FEATURES))) * [10, 100, 200, 50]
+    band = np.minimum((values[:, 2] // 70).astype(int), 2)
+    df = pd.DataFrame(values.round(2), columns=FEATURES)
+    df["source_label"] = "Test"
+    df["health_impact"] = [HEALTH[b] for b in band]
+    df["Precautionary_Measures"] = [MEASURES[b] for b in band]
+    df["AQI"] = band * 50.0
+    return df
+
+
+def exact_rows(points, df):
+    # The lookup predict_logic does, one query at a time
+    return [((df[FEATURES] - point) ** 2).sum(axis=1).idxmin() for point in points]
+
+
+def test_nearest_rows_matches_predict_logic(monkeypatch):
+    df = make_dataset()
+    points = np.random.default_rng(1).random((50, len(FEATURES))) * [10, 100, 200, 50]
+    # Force many small chunks
+    monkeypatch.setattr(reference_table, "CHUNK_ELEMENTS", 7 * len(df) * len(FEATURES))
+    assert list(nearest_rows(points, df[FEATURES])) == exact_rows(points, df)
+
+
+def test_compact_keeps_first_duplicate_and_every_row_by_default():
+    df = make_dataset()
+    duplicate = df.iloc[[5]].assign(AQI=999.0)
+    compacted = compact(pd.concat([df, duplicate], ignore_index=True))
+    assert len(compacted) == len(df)
+    assert compacted.iloc[5]["AQI"] == df.iloc[5]["AQI"]
+
+
+def assert_same_answers(thinned, df):
+    # Through predict_logic's own lookup, so ties resolve exactly as served
+    nearest = thinned.iloc[exact_rows(df[FEATURES].to_numpy(), thinned)]
+    for column in ["health_impact", "Precautionary_Measures", "AQI"]:
+        assert list(nearest[column]) == list(df[column])
+
+
+def test_thinning_preserves_every_answer():
+    df = make_dataset()
+    thinned = compact(df, thin=True)
+    assert len(thinned) < len(df)
+    assert_same_answers(thinned, df)
+
+    # Row 3 is equidistant from rows 1 and 2, and row 2 is kept before
+    # row 1; the earlier row 1 wins the tie and gives the wrong answer
+    tied = pd.DataFrame(0.0, index=range(4), columns=FEATURES)
+    tied["PM2.5"] = [4.0, 1.0, 3.0, 2.0]
+    tied["health_impact"] = ["Unhealthy", "Unhealthy", "Moderate", "Moderate"]
+    tied["Precautionary_Measures"] = MEASURES[0]
+    tied["AQI"] = [100.0, 100.0, 50.0, 50.0]
+    assert_same_answers(compact(tied, thin=True), tied)
+
+
+def test_thinning_keeps_rows_with_distinct_aqi():
+    df = make_dataset()
+    df["AQI"] = np.arange(len(df), dtype=float)
+    assert len(compact(df, thin=True)) == len(df)
+
+
+@pytest.mark.parametrize("bins", [1, 8, 32])
+def test_grid_matches_exact_lookup(bins):
+    df = make_dataset()
+    scaler = MinMaxScaler().fit(df[FEATURES])
+    grid = LookupGrid.build(df, scaler, bins=bins)
+
+    rng = np.random.default_rng(2)
+    points = np.vstack([
+        df[FEATURES].to_numpy(),
+        scaler.inverse_transform(rng.random((1000, len(FEATURES)))),
+        # Midpoints between rows: exact ties go to the first row
+        (df[FEATURES].to_numpy()[:-1] + df[FEATURES].to_numpy()[1:]) / 2,
+    ])
+    assert [grid.lookup(point) for point in points] == exact_rows(points, df)
+
+
+def test_grid_scans_few_rows():
+    df = make_dataset(rows=1000)
+    grid = LookupGrid.build(df, MinMaxScaler().fit(df[FEATURES]), bins=32)
+    assert grid.mean_candidates < len(df) / 10
+
+
+def test_lookup_outside_scaler_range_falls_back():
+    df = make_dataset()
+    grid = LookupGrid.build(df, MinMaxScaler().fit(df[FEATURES]), bins=4)
+    assert grid.lookup([20.0, 50.0, 100.0, 25.0]) is None
+
+
+def test_load_rejects_grid_built_for_other_data_or_scaler(tmp_path):
+    df = make_dataset()
+    scaler = MinMaxScaler().fit(df[FEATURES])
+    path = tmp_path / "grid.npz"
+    LookupGrid.build(df, scaler, bins=8).save(path)
+
+    loaded = LookupGrid.load(path, df, scaler)
+    assert loaded is not None
+    assert loaded.lookup(df[FEATURES].iloc[7]) == 7
+    assert LookupGrid.load(path, df.assign(AQI=df["AQI"] + 1), scaler) is None
+
+    # e.g. train_model.py refitting the scaler on a grown CSV
+    refitted = MinMaxScaler().fit(make_dataset(rows=500, seed=1)[FEATURES])
+    assert LookupGrid.load(path, df, refitted) is None
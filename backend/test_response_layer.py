@@ -0,0 +1,108 @@
+import gzip
+import json
+from datetime import datetime
+
+import numpy as np
+import pytest
+from bson import ObjectId
+from flask import Flask
+
+from response_layer import (MIN_COMPRESS_SIZE, dumps, json_response,
+                            latest_reading_timestamp, not_modified)
+
+app = Flask(__name__)
+
+LATEST = datetime(2024, 1, 1, 12, 30, 15, 250000)
+
+
+class StubCollection:
+    """Just enough of a pymongo collection for latest_reading_timestamp."""
+
+    def __init__(self, timestamps):
+        self.timestamps = timestamps
+
+    def find_one(self, query, projection=None, sort=None):
+        if not self.timestamps:
+            return None
+        return {"timestamp": max(self.timestamps)}
+
+
+def fresh_response(url="/api/historical-data?limit=10"):
+    with app.test_request_context(url):
+        return json_response({"data": []}, latest_timestamp=LATEST)
+
+
+def test_latest_reading_timestamp():
+    assert latest_reading_timestamp(StubCollection([datetime(2023, 1, 1), LATEST])) == LATEST
+    assert latest_reading_timestamp(StubCollection([])) is None
+
+
+def test_304_on_matching_if_none_match():
+    etag = fresh_response().headers["ETag"]
+    with app.test_request_context("/api/historical-data?limit=10", headers={"If-None-Match": etag}):
+        response = not_modified(LATEST)
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+
+def test_304_on_if_modified_since():
+    last_modified = fresh_response().headers["Last-Modified"]
+    with app.test_request_context("/api/historical-data?limit=10",
+                                  headers={"If-Modified-Since": last_modified}):
+        assert not_modified(LATEST).status_code == 304
+
+
+def test_full_response_when_url_differs():
+    etag = fresh_response().headers["ETag"]
+    with app.test_request_context("/api/historical-data?limit=20", headers={"If-None-Match": etag}):
+        assert not_modified(LATEST) is None
+
+
+def test_full_response_after_new_reading():
+    etag = fresh_response().headers["ETag"]
+    with app.test_request_context("/api/historical-data?limit=10", headers={"If-None-Match": etag}):
+        assert not_modified(datetime(2024, 1, 1, 12, 31)) is None
+
+
+def test_no_validators_without_readings():
+    with app.test_request_context("/api/mongodb-stats"):
+        assert not_modified(None) is None
+        assert "ETag" not in json_response({"connected": True}).headers
+
+
+@pytest.mark.parametrize("accept, size, encoding", [
+    ("gzip", MIN_COMPRESS_SIZE * 2, "gzip"),
+    ("gzip", MIN_COMPRESS_SIZE // 4, None),
+    ("gzip;q=0", MIN_COMPRESS_SIZE * 2, None),
+    ("identity", MIN_COMPRESS_SIZE * 2, None),
+    ("br, gzip", MIN_COMPRESS_SIZE * 2, "br"),
+])
+def test_compression_negotiation(accept, size, encoding):
+    payload = {"data": "x" * size}
+    with app.test_request_context("/", headers={"Accept-Encoding": accept}):
+        response = json_response(payload)
+    assert response.headers.get("Content-Encoding") == encoding
+    assert "Accept-Encoding" in response.headers["Vary"]
+    if encoding == "gzip":
+        assert json.loads(gzip.decompress(response.get_data())) == payload
+
+
+def test_non_finite_floats_encode_as_null():
+    encoded = json.loads(dumps({
+        "nan": float("nan"),
+        "np_nan": np.float64("nan"),
+        "inf": np.float64("inf"),
+        "half": np.float16(1.5),
+        "array": np.array([1.0, np.nan]),
+    }))
+    assert encoded == {"nan": None, "np_nan": None, "inf": None, "half": 1.5, "array": [1.0, None]}
+
+
+def test_object_id_and_datetime_encoding():
+    object_id = ObjectId()
+    encoded = json.loads(dumps({"_id": object_id, "timestamp": LATEST, "count": np.int64(3)}))
+    assert encoded == {
+        "_id": str(object_id),
+        "timestamp": "2024-01-01T12:30:15.250000+00:00",
+        "count": 3,
+    }